@@ -11,8 +11,8 @@ def get_mongo_client(request: Request) -> AsyncIOMotorClient:
 def get_profile_repository(mongo_client: AsyncIOMotorClient = Depends(get_mongo_client)) -> ProfileRepository:
     return ProfileRepository(mongo_client)
 
-def get_campaign_repository() -> CampaignRepository:
-    return CampaignRepository()
+def get_campaign_repository(request: Request) -> CampaignRepository:
+    return request.app.state.campaign_repository
 
 def get_service(
     profile_repository: ProfileRepository = Depends(get_profile_repository),
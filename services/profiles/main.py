@@ -3,12 +3,19 @@ from fastapi import FastAPI
 from motor.motor_asyncio import AsyncIOMotorClient
 from contextlib import asynccontextmanager
 from services.profiles.api import health_router, client_config_router
+from services.profiles.repository.campaigns import CampaignRepository
+from services.profiles.warmup import warm_up
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-    app.state.mongo_client = AsyncIOMotorClient(mongo_url)
+    mongo_min_pool_size = int(os.environ.get("MONGO_MIN_POOL_SIZE", "10"))
+    app.state.mongo_client = AsyncIOMotorClient(mongo_url, minPoolSize=mongo_min_pool_size)
+    app.state.campaign_repository = CampaignRepository(ttl=float(os.environ.get("CAMPAIGNS_CACHE_TTL_SECONDS", "300")))
     try:
+        if os.environ.get("WARMUP_ENABLED", "true").lower() == "true":
+            warmup_timeout = float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "10"))
+            await warm_up(app, mongo_min_pool_size, warmup_timeout)
         yield
     finally:
         app.state.mongo_client.close()
@@ -0,0 +1,36 @@
+"""
+Rematch job: update the active_campaigns stored on profiles for the campaigns that changed
+since the job last ran.
+
+Meant to run periodically outside the request path (e.g. as a Kubernetes CronJob), once per
+deployment rather than per replica:
+
+    python -m services.profiles.rematch
+"""
+import asyncio
+import logging
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.profiles.repository.campaigns import CampaignRepository
+from services.profiles.repository.campaigns_snapshot import CampaignDiff, CampaignSnapshotStore
+from services.profiles.repository.profiles import ProfileRepository
+from services.profiles.service import ProfileService
+
+async def rematch(mongo_client: AsyncIOMotorClient, campaign_repository: CampaignRepository) -> CampaignDiff:
+    profile_repository = ProfileRepository(mongo_client)
+    await profile_repository.ensure_rematch_indexes()
+    service = ProfileService(profile_repository, campaign_repository)
+    diff = await service.rematch_changed_campaigns(CampaignSnapshotStore(mongo_client))
+    logging.info(f"Rematched campaigns: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.modified)} modified")
+    return diff
+
+async def main() -> None:
+    mongo_client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    try:
+        await rematch(mongo_client, CampaignRepository())
+    finally:
+        mongo_client.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,10 +1,32 @@
+import asyncio
+import os
+import time
 from typing import List, Optional
 from .campaigns_types import Campaign, CampaignResponse
+from .campaigns_snapshot import CampaignSnapshot
 import httpx
 from datetime import datetime, timezone
-from aiocache import cached, SimpleMemoryCache
 
 class CampaignRepository:
+    """
+    Repository class for fetching campaigns from the Campaign Service.
+
+    One instance is owned by the application (see lifespan in main.py) so that the cached
+    campaign snapshot is shared by all requests.
+
+    Args:
+        url (str): The campaigns endpoint. Defaults to the CAMPAIGNS_URL environment variable, or the Docker Compose hostname.
+        transport (httpx.AsyncBaseTransport): Optional transport, e.g. an ASGI transport to an in-process stand-in.
+        ttl (float): Seconds a campaign snapshot is served before being refetched.
+    """
+    def __init__(self, url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None, ttl: float = 300):
+        self._url = url or os.environ.get("CAMPAIGNS_URL", "http://campaigns:8000/campaigns")
+        self._transport = transport
+        self._ttl = ttl
+        self._snapshot: Optional[CampaignSnapshot] = None
+        self._snapshot_expires = 0.0
+        self._snapshot_lock = asyncio.Lock()
+
     async def get_active_campaigns(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Campaign]:
         """
         Get active campaigns in the given interval. If no interval is given, active campaigns at the current time are returned.
@@ -16,10 +38,21 @@ class CampaignRepository:
             end_date = now
         return await self._fetch_campaigns(start_date, end_date)
 
-    @cached(ttl=300, cache=SimpleMemoryCache)
+    async def get_snapshot(self) -> CampaignSnapshot:
+        """
+        Get a snapshot of the campaigns active at the current time.
+        The snapshot is fetched at most once per ttl; concurrent callers share a single fetch.
+        """
+        if self._snapshot is None or time.monotonic() >= self._snapshot_expires:
+            async with self._snapshot_lock:
+                if self._snapshot is None or time.monotonic() >= self._snapshot_expires:
+                    self._snapshot = CampaignSnapshot(await self.get_active_campaigns())
+                    self._snapshot_expires = time.monotonic() + self._ttl
+        return self._snapshot
+
     async def _fetch_campaigns(self, start_date: datetime, end_date: datetime) -> List[Campaign]:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://campaigns:8000/campaigns", params={"start_date": start_date.isoformat(), "end_date": end_date.isoformat()})
+        async with httpx.AsyncClient(transport=self._transport) as client:
+            response = await client.get(self._url, params={"start_date": start_date.isoformat(), "end_date": end_date.isoformat()})
             response.raise_for_status()
             campaigns_raw = response.json()
             campaigns_response = CampaignResponse(campaigns_raw)
@@ -0,0 +1,99 @@
+from typing import Dict, Iterable, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from .campaigns_types import Campaign
+from .profiles_compact import ProfileVocabulary
+
+class CampaignDiff(BaseModel):
+    added: List[Campaign] = []
+    removed: List[Campaign] = []
+    # (old, new) pairs for campaigns present in both snapshots whose definition changed
+    modified: List[Tuple[Campaign, Campaign]] = []
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified)
+
+class CampaignSnapshot:
+    """
+    Immutable view of the active campaigns at a point in time, keyed by campaign name.
+
+    Two snapshots can be diffed to find which campaigns were added, removed or modified,
+    so that only the profiles affected by those campaigns need to be rematched.
+
+    Usage:
+        old = CampaignSnapshot(previous_campaigns)
+        new = CampaignSnapshot(await campaign_repository.get_active_campaigns())
+        diff = old.diff(new)
+    """
+    def __init__(self, campaigns: Iterable[Campaign] = ()):
+        self._campaigns: Dict[str, Campaign] = {c.name: c for c in campaigns}
+        self._vocabulary: ProfileVocabulary | None = None
+
+    @property
+    def campaigns(self) -> List[Campaign]:
+        return list(self._campaigns.values())
+
+    @property
+    def vocabulary(self) -> ProfileVocabulary:
+        """
+        Vocabulary shared by the compact profiles and compact campaigns matched against this snapshot.
+        It is dropped with the snapshot, so names no longer in use do not accumulate.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = ProfileVocabulary()
+        return self._vocabulary
+
+    def __len__(self) -> int:
+        return len(self._campaigns)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._campaigns
+
+    def get(self, name: str) -> Campaign | None:
+        return self._campaigns.get(name)
+
+    def diff(self, new: "CampaignSnapshot") -> CampaignDiff:
+        """
+        Compare this (old) snapshot with a newer one.
+        """
+        old_campaigns, new_campaigns = self._campaigns, new._campaigns
+        return CampaignDiff(
+            added=[c for name, c in new_campaigns.items() if name not in old_campaigns],
+            removed=[c for name, c in old_campaigns.items() if name not in new_campaigns],
+            modified=[
+                (old_campaigns[name], c)
+                for name, c in new_campaigns.items()
+                if name in old_campaigns and old_campaigns[name] != c
+            ],
+        )
+
+class CampaignSnapshotStore:
+    """
+    Persists the campaign snapshot that stored profiles were last rematched against.
+
+    The snapshot lives in a single document of the profiles_db.campaign_snapshots collection,
+    so that a rematch job can diff the current campaigns against it on its next run.
+
+    Args:
+        db (AsyncIOMotorClient): The MongoDB client or a mock/fake object for testing.
+    """
+    SNAPSHOT_ID = "active_campaigns"
+
+    def __init__(self, db: AsyncIOMotorClient):
+        self.db = db
+
+    async def load(self) -> CampaignSnapshot:
+        """
+        Load the last saved snapshot, or an empty snapshot if none was saved yet.
+        """
+        document = await self.db["profiles_db"]["campaign_snapshots"].find_one({"_id": self.SNAPSHOT_ID})
+        if not document:
+            return CampaignSnapshot()
+        return CampaignSnapshot(Campaign.model_validate(c) for c in document["campaigns"])
+
+    async def save(self, snapshot: CampaignSnapshot) -> None:
+        await self.db["profiles_db"]["campaign_snapshots"].replace_one(
+            {"_id": self.SNAPSHOT_ID},
+            {"campaigns": [c.model_dump() for c in snapshot.campaigns]},
+            upsert=True,
+        )
@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateMany
 from .profiles_types import Profile
+from .profiles_compact import CompactProfile, ProfileVocabulary
 
 class ProfileRepository:
     """
@@ -26,3 +28,47 @@ class ProfileRepository:
             # Validate profile using Pydantic. Raise if invalid.
             profile = Profile.model_validate(profile)
         return profile
+
+    async def find_compact_profiles(self, query: Dict[str, Any], vocabulary: ProfileVocabulary) -> AsyncIterator[CompactProfile]:
+        """
+        Stream the profiles matching query as CompactProfile records, for matching-only batch paths.
+        Only the fields needed for matching are fetched, and documents are not validated into Profile models.
+        """
+        projection = {"_id": 0, "player_id": 1, "level": 1, "country": 1, "inventory": 1}
+        async for document in self.db["profiles_db"]["profiles"].find(query, projection):
+            yield CompactProfile.from_document(document, vocabulary)
+
+    async def ensure_rematch_indexes(self) -> None:
+        """
+        Create the indexes used by bulk_update_active_campaigns filters. Idempotent.
+
+        active_campaigns narrows $pull to profiles holding the campaign; level and country
+        narrow $addToSet to candidate profiles.
+        """
+        await self.db["profiles_db"]["profiles"].create_indexes([
+            IndexModel("active_campaigns"),
+            IndexModel("level"),
+            IndexModel("country"),
+        ])
+
+    async def bulk_update_active_campaigns(
+        self,
+        additions: List[Tuple[str, Dict[str, Any]]],
+        removals: List[Tuple[str, Dict[str, Any]]],
+    ) -> None:
+        """
+        Add or remove campaign names from active_campaigns in a single bulk write.
+
+        Each entry is a (campaign_name, filter) pair. Removals run before additions so that a
+        campaign can be pulled from profiles that no longer match and added to those that do.
+        Filters are narrowed to profiles whose active_campaigns actually need to change.
+        """
+        requests = [
+            UpdateMany({**query, "active_campaigns": name}, {"$pull": {"active_campaigns": name}})
+            for name, query in removals
+        ] + [
+            UpdateMany({**query, "active_campaigns": {"$ne": name}}, {"$addToSet": {"active_campaigns": name}})
+            for name, query in additions
+        ]
+        if requests:
+            await self.db["profiles_db"]["profiles"].bulk_write(requests, ordered=True)
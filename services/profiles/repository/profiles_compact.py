@@ -0,0 +1,103 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from .profiles_types import Profile
+
+class Vocabulary:
+    """
+    Interns strings to dense integer ids, so that repeated names are stored once.
+    """
+    __slots__ = ("_ids", "_names")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        index = self._ids.get(name)
+        if index is None:
+            index = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return index
+
+    def name(self, index: int) -> str:
+        return self._names[index]
+
+class ProfileVocabulary:
+    """
+    Country codes and item names interned for the compact profiles matched against one campaign snapshot.
+    """
+    __slots__ = ("countries", "items")
+
+    def __init__(self) -> None:
+        self.countries = Vocabulary()
+        self.items = Vocabulary()
+
+def as_int(value: Any, field: str) -> int:
+    """
+    Coerce a stored number to int like Profile validation does: integral floats such as the
+    BSON double 5.0 become 5, other floats are rejected.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"{field} must be an integer (got: {value!r})")
+
+class CompactProfile:
+    """
+    Matching-only view of a profile: player_id, level, interned country and inventory.
+
+    The inventory is stored as parallel arrays of item ids (sorted) and quantities instead of a dict,
+    and no nested Device/Clan models are built. Use it on batch and bulk paths where only campaign
+    matching is needed; use Profile when the full document is served.
+
+    Usage:
+        vocabulary = snapshot.vocabulary
+        compact = CompactProfile.from_document(document, vocabulary)
+        inventory = compact.inventory()
+    """
+    __slots__ = ("player_id", "level", "country", "item_ids", "quantities", "vocabulary")
+
+    def __init__(self, player_id: str, level: int, country: str, inventory: Mapping[str, int], vocabulary: ProfileVocabulary):
+        items = sorted((vocabulary.items.intern(item), as_int(quantity, f"inventory.{item}")) for item, quantity in inventory.items())
+        self.player_id = player_id
+        self.level = as_int(level, "level")
+        self.country = vocabulary.countries.intern(country)
+        self.item_ids = array("I", [item_id for item_id, _ in items])
+        quantities = [quantity for _, quantity in items]
+        try:
+            self.quantities: Sequence[int] = array("q", quantities)
+        except OverflowError:
+            # Stored integers fit in 64 bits, but a validated Profile may hold larger Python ints
+            self.quantities = tuple(quantities)
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_document(cls, document: Mapping[str, Any], vocabulary: ProfileVocabulary) -> "CompactProfile":
+        """
+        Build from a raw MongoDB document, without Pydantic validation.
+        """
+        return cls(document["player_id"], document["level"], document["country"], document["inventory"], vocabulary)
+
+    @classmethod
+    def from_profile(cls, profile: Profile, vocabulary: ProfileVocabulary) -> "CompactProfile":
+        return cls(profile.player_id, profile.level, profile.country, profile.inventory, vocabulary)
+
+    def quantity(self, item_id: int) -> Optional[int]:
+        """
+        Quantity held of the item, or None if it is not in the inventory.
+        """
+        index = bisect_left(self.item_ids, item_id)
+        if index < len(self.item_ids) and self.item_ids[index] == item_id:
+            return self.quantities[index]
+        return None
+
+    def country_code(self) -> str:
+        return self.vocabulary.countries.name(self.country)
+
+    def inventory(self) -> Dict[str, int]:
+        return {self.vocabulary.items.name(item_id): quantity for item_id, quantity in zip(self.item_ids, self.quantities)}
@@ -1,5 +1,7 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from services.profiles.repository.campaigns_types import Campaign
+from services.profiles.repository.campaigns_snapshot import CampaignDiff, CampaignSnapshotStore
+from services.profiles.repository.profiles_compact import CompactProfile, ProfileVocabulary
 from services.profiles.repository.profiles_types import Profile
 from services.profiles.repository.profiles import ProfileRepository
 from services.profiles.repository.campaigns import CampaignRepository
@@ -13,11 +15,48 @@ class ProfileService:
         profile = await self._profile_repository.get_profile_by_player_id(player_id)
         if not profile:
             return None
-        campaigns = await self._campaign_repository.get_active_campaigns()
-        matched_campaigns = [c.name for c in campaigns if match_campaign(profile, c)]
+        snapshot = await self._campaign_repository.get_snapshot()
+        matched_campaigns = [c.name for c in snapshot.campaigns if match_campaign(profile, c)]
         profile.active_campaigns = matched_campaigns
         return profile
 
+    async def rematch_changed_campaigns(self, snapshot_store: CampaignSnapshotStore) -> CampaignDiff:
+        """
+        Diff the current campaigns against the last rematched snapshot, rematch the stored
+        profiles for the changes, then save the current snapshot for the next run.
+        """
+        previous = await snapshot_store.load()
+        current = await self._campaign_repository.get_snapshot()
+        diff = previous.diff(current)
+        if not diff.is_empty():
+            await self.rematch_campaign_diff(diff)
+        await snapshot_store.save(current)
+        return diff
+
+    async def rematch_campaign_diff(self, diff: CampaignDiff) -> None:
+        """
+        Update stored profiles' active_campaigns for the campaigns in the diff only.
+
+        Added campaigns are pushed onto matching profiles, removed campaigns are pulled from
+        every profile holding them, and modified campaigns are pulled from profiles that no
+        longer match and pushed onto those that now do. Campaigns whose matchers did not
+        change are skipped since their eligible profiles are unchanged.
+        """
+        additions: List[Tuple[str, Dict[str, Any]]] = []
+        removals: List[Tuple[str, Dict[str, Any]]] = []
+        for campaign in diff.added:
+            additions.append((campaign.name, campaign_filter(campaign)))
+        for campaign in diff.removed:
+            removals.append((campaign.name, {}))
+        for old, new in diff.modified:
+            if old.matchers == new.matchers:
+                continue
+            candidates = campaign_filter(new)
+            if candidates:
+                removals.append((new.name, {"$nor": [candidates]}))
+            additions.append((new.name, candidates))
+        await self._profile_repository.bulk_update_active_campaigns(additions, removals)
+
 def level_matcher(profile: Profile, campaign: Campaign) -> bool:
     matchers = campaign.matchers
     if matchers.level:
@@ -51,3 +90,79 @@ def match_campaign(profile: Profile, campaign: Campaign) -> bool:
         does_not_have_matcher
     ]
     return all(matcher(profile, campaign) for matcher in matcher_functions)
+
+class CompactCampaign:
+    """
+    A campaign's matchers compiled against a ProfileVocabulary, for matching CompactProfile records.
+    """
+    __slots__ = ("name", "level", "countries", "has_items", "does_not_have_items")
+
+    def __init__(self, campaign: Campaign, vocabulary: ProfileVocabulary):
+        matchers = campaign.matchers
+        self.name = campaign.name
+        self.level = (matchers.level.min, matchers.level.max) if matchers.level else None
+        has = matchers.has
+        self.countries = frozenset(vocabulary.countries.intern(c) for c in has.country) if has and has.country else None
+        self.has_items = tuple(vocabulary.items.intern(i) for i in has.items) if has and has.items else ()
+        does_not_have = matchers.does_not_have
+        self.does_not_have_items = tuple(vocabulary.items.intern(i) for i in does_not_have.items) if does_not_have and does_not_have.items else ()
+
+def match_compact_campaign(profile: CompactProfile, campaign: CompactCampaign) -> bool:
+    """
+    Equivalent of match_campaign for a CompactProfile and a CompactCampaign built on the same vocabulary.
+    """
+    if campaign.level and not campaign.level[0] <= profile.level <= campaign.level[1]:
+        return False
+    if campaign.countries is not None and profile.country not in campaign.countries:
+        return False
+    for item_id in campaign.has_items:
+        if profile.quantity(item_id) is None:
+            return False
+    for item_id in campaign.does_not_have_items:
+        quantity = profile.quantity(item_id)
+        if quantity is not None and quantity > 0:
+            return False
+    return True
+
+def campaign_filter(campaign: Campaign) -> Dict[str, Any]:
+    """
+    Translate a campaign's matchers into a MongoDB filter selecting the profiles it matches.
+
+    Mirrors level_matcher, has_matcher and does_not_have_matcher, so that
+    match_campaign(profile, campaign) holds exactly for the profiles returned by the filter.
+    Item names that cannot be used in a dotted field path (empty, containing '.' or starting
+    with '$') are matched with $getField in an $expr instead, so they are never read as a
+    nested path or an operator.
+    """
+    matchers = campaign.matchers
+    query: Dict[str, Any] = {}
+    expressions: List[Dict[str, Any]] = []
+    if matchers.level:
+        query["level"] = {"$gte": matchers.level.min, "$lte": matchers.level.max}
+    if matchers.has:
+        if matchers.has.country:
+            query["country"] = {"$in": list(matchers.has.country)}
+        if matchers.has.items:
+            for item in matchers.has.items:
+                if is_field_name_safe(item):
+                    query.setdefault(f"inventory.{item}", {})["$exists"] = True
+                else:
+                    expressions.append({"$ne": [{"$type": inventory_field(item)}, "missing"]})
+    if matchers.does_not_have and matchers.does_not_have.items:
+        for item in matchers.does_not_have.items:
+            if is_field_name_safe(item):
+                query.setdefault(f"inventory.{item}", {})["$not"] = {"$gt": 0}
+            else:
+                expressions.append({"$not": [{"$gt": [inventory_field(item), 0]}]})
+    if expressions:
+        query["$expr"] = {"$and": expressions}
+    return query
+
+def is_field_name_safe(name: str) -> bool:
+    return bool(name) and "." not in name and not name.startswith("$")
+
+def inventory_field(item: str) -> Dict[str, Any]:
+    """
+    Aggregation expression reading inventory[item] literally, whatever characters the item name contains.
+    """
+    return {"$getField": {"field": {"$literal": item}, "input": "$inventory"}}
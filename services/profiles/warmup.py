@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+import httpx
+from fastapi import FastAPI
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.profiles.dependencies import get_mongo_client
+
+T = TypeVar("T")
+
+WARMUP_PLAYER_ID = "__warmup__"
+
+# Representative profile used to exercise validation, matching and serialization once before serving traffic
+SYNTHETIC_PROFILE: Dict[str, Any] = {
+    "player_id": WARMUP_PLAYER_ID,
+    "credential": "warmup",
+    "created": "2021-01-10 13:37:17Z",
+    "modified": "2021-01-23 13:37:17Z",
+    "last_session": "2021-01-23 13:37:17Z",
+    "total_spent": 0,
+    "total_refund": 0,
+    "total_transactions": 0,
+    "last_purchase": "2021-01-22 13:37:17Z",
+    "active_campaigns": [],
+    "devices": [{"id": 1, "model": "warmup", "carrier": "warmup", "firmware": "warmup"}],
+    "level": 1,
+    "xp": 0,
+    "total_playtime": 0,
+    "country": "CA",
+    "language": "fr",
+    "birthdate": "2000-01-10 13:37:17Z",
+    "gender": "male",
+    "inventory": {"cash": 0, "coins": 0, "item_1": 0},
+    "clan": {"id": "0", "name": "warmup"},
+}
+
+async def open_mongo_connections(mongo_client: AsyncIOMotorClient, count: int) -> None:
+    """
+    Open up to `count` pooled connections by running that many concurrent pings.
+    """
+    await asyncio.gather(*(mongo_client.admin.command({"ping": 1}) for _ in range(count)))
+
+class SyntheticProfiles:
+    """
+    Stands in for the profiles collection during warm-up, serving SYNTHETIC_PROFILE for any player_id.
+    """
+    async def find_one(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(SYNTHETIC_PROFILE)
+
+async def request_client_config(app: FastAPI) -> int:
+    """
+    Send one in-process request through the client config route, served the synthetic profile.
+
+    The full request path runs once: dependency resolution, profile validation, campaign
+    matching against the cached snapshot and response serialization. Returns the status code.
+    """
+    previous = app.dependency_overrides.get(get_mongo_client)
+    app.dependency_overrides[get_mongo_client] = lambda: {"profiles_db": {"profiles": SyntheticProfiles()}}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            response = await client.get(f"/get_client_config/{WARMUP_PLAYER_ID}")
+            return response.status_code
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_mongo_client, None)
+        else:
+            app.dependency_overrides[get_mongo_client] = previous
+
+async def _timed(step: str, awaitable: Awaitable[T], timeout: float) -> Optional[T]:
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout)
+    except Exception as e:
+        logging.warning(f"Warm-up step {step} failed after {time.perf_counter() - started:.3f}s: {e!r}")
+        return None
+    logging.info(f"Warm-up step {step} took {time.perf_counter() - started:.3f}s")
+    return result
+
+async def warm_up(app: FastAPI, mongo_connections: int, timeout: float) -> None:
+    """
+    Warm the service before it accepts traffic.
+
+    Opens Mongo connections and prefetches the campaign snapshot into the application's
+    CampaignRepository, which serves it to requests until it expires. Then sends one
+    synthetic validate+match+serialize request through the client config route.
+    Each step is bounded by `timeout` seconds; failures are logged and do not block startup.
+    """
+    started = time.perf_counter()
+    await _timed("mongo_connections", open_mongo_connections(app.state.mongo_client, mongo_connections), timeout)
+    await _timed("campaign_snapshot", app.state.campaign_repository.get_snapshot(), timeout)
+    status_code = await _timed("client_config_request", request_client_config(app), timeout)
+    if status_code is not None and status_code != 200:
+        logging.warning(f"Warm-up client config request returned HTTP {status_code}")
+    logging.info(f"Warm-up completed in {time.perf_counter() - started:.3f}s")
@@ -0,0 +1,34 @@
+import os
+
+# Startup warm-up reaches out to MongoDB and the campaigns service; tests enable it explicitly.
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+from typing import Any, Dict, Iterable
+from unittest.mock import AsyncMock, Mock, create_autospec
+from motor.motor_asyncio import AsyncIOMotorClient
+from tools import traffic_simulator
+
+def create_fake_db():
+    return create_autospec(AsyncIOMotorClient, instance=True)
+
+class FakeCollection(traffic_simulator.FakeCollection):
+    async def bulk_write(self, requests, ordered):
+        for request in requests:
+            self.documents[request._filter["player_id"]] = request._doc
+
+class FakeMongoClient(traffic_simulator.FakeMongoClient):
+    """
+    Stands in for AsyncIOMotorClient in tests: serves and seeds profiles, answers pings
+    and serverStatus opcounters, and records close().
+    """
+    def __init__(self, profiles: Iterable[Dict[str, Any]] = ()):
+        super().__init__([])
+        self.profiles = FakeCollection()
+        self.profiles.documents = {p["player_id"]: p for p in profiles}
+        self.admin = Mock(command=AsyncMock(side_effect=self._command))
+        self.close = Mock()
+
+    async def _command(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        if "serverStatus" in command:
+            return {"opcounters": {"query": self.profiles.ops, "insert": 0}}
+        return {"ok": 1}
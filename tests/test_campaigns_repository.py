@@ -21,13 +21,6 @@ from hypothesis.strategies import from_type
 
 campaign_strategy = from_type(Campaign)
 
-@pytest.fixture(autouse=True)
-def patch_fetch_campaigns(monkeypatch):
-    # Patch the _fetch_campaigns method to remove the aiocache decorator for tests
-    orig = CampaignRepository._fetch_campaigns.__wrapped__
-    monkeypatch.setattr(CampaignRepository, "_fetch_campaigns", orig)
-    yield
-
 def make_mock_get(called, campaign):
     async def mock_get(self, url, params=None, **kwargs):
         called['url'] = url
@@ -116,3 +109,26 @@ async def test_get_active_campaigns_invalid_campaign(invalid_campaign: Campaign)
         repo = CampaignRepository()
         with pytest.raises(pydantic.ValidationError):
             await repo.get_active_campaigns()
+
+@pytest.mark.asyncio
+@given(campaign_strategy)
+async def test_get_snapshot_is_cached_until_ttl(campaign: Campaign) -> None:
+    """
+    Test that get_snapshot fetches once per ttl, and refetches after it expires.
+    """
+    called = {}
+    fetches = []
+    mock_get = make_mock_get(called, campaign)
+    async def counting_get(self, url, params=None, **kwargs):
+        fetches.append(url)
+        return await mock_get(self, url, params, **kwargs)
+    with patch("httpx.AsyncClient.get", counting_get):
+        repo = CampaignRepository(ttl=300)
+        first = await repo.get_snapshot()
+        assert await repo.get_snapshot() is first
+        assert first.get(campaign.name) == campaign
+        assert len(fetches) == 1
+        expired = CampaignRepository(ttl=0)
+        await expired.get_snapshot()
+        await expired.get_snapshot()
+        assert len(fetches) == 3
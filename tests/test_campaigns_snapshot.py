@@ -0,0 +1,63 @@
+"""
+Unit tests for CampaignSnapshot diffing and CampaignSnapshotStore persistence.
+"""
+import pytest
+from hypothesis import given
+from hypothesis.strategies import from_type
+from unittest.mock import AsyncMock
+from conftest import create_fake_db
+from services.profiles.repository.campaigns_snapshot import CampaignSnapshot, CampaignSnapshotStore
+from services.profiles.repository.campaigns_types import Campaign, Matchers, LevelMatcher
+
+st_campaign = from_type(Campaign)
+
+@given(st_campaign)
+def test_diff_identical_snapshots_is_empty(campaign: Campaign):
+    assert CampaignSnapshot([campaign]).diff(CampaignSnapshot([campaign])).is_empty()
+
+@given(st_campaign)
+def test_diff_added_and_removed(campaign: Campaign):
+    old = campaign.model_copy(update={"name": "old"})
+    new = campaign.model_copy(update={"name": "new"})
+    diff = CampaignSnapshot([old]).diff(CampaignSnapshot([new]))
+    assert diff.added == [new]
+    assert diff.removed == [old]
+    assert diff.modified == []
+
+@given(st_campaign)
+def test_diff_modified(campaign: Campaign):
+    old = campaign.model_copy(update={"matchers": Matchers()})
+    new = campaign.model_copy(update={"matchers": Matchers(level=LevelMatcher(min=1, max=2))})
+    diff = CampaignSnapshot([old]).diff(CampaignSnapshot([new]))
+    assert diff.added == []
+    assert diff.removed == []
+    assert diff.modified == [(old, new)]
+
+@given(st_campaign)
+def test_snapshot_lookup(campaign: Campaign):
+    snapshot = CampaignSnapshot([campaign])
+    assert len(snapshot) == 1
+    assert campaign.name in snapshot
+    assert snapshot.get(campaign.name) == campaign
+    assert snapshot.campaigns == [campaign]
+
+@pytest.mark.asyncio
+async def test_snapshot_store_load_empty():
+    fake_db = create_fake_db()
+    fake_db["profiles_db"]["campaign_snapshots"].find_one = AsyncMock(return_value=None)
+    snapshot = await CampaignSnapshotStore(fake_db).load()
+    assert len(snapshot) == 0
+
+@pytest.mark.asyncio
+@given(st_campaign)
+async def test_snapshot_store_save_and_load(campaign: Campaign):
+    fake_db = create_fake_db()
+    collection = fake_db["profiles_db"]["campaign_snapshots"]
+    collection.replace_one = AsyncMock()
+    await CampaignSnapshotStore(fake_db).save(CampaignSnapshot([campaign]))
+    query, document = collection.replace_one.await_args.args
+    assert query == {"_id": CampaignSnapshotStore.SNAPSHOT_ID}
+    assert collection.replace_one.await_args.kwargs == {"upsert": True}
+    collection.find_one = AsyncMock(return_value={**document, "_id": CampaignSnapshotStore.SNAPSHOT_ID})
+    loaded = await CampaignSnapshotStore(fake_db).load()
+    assert loaded.diff(CampaignSnapshot([campaign])).is_empty()
@@ -0,0 +1,106 @@
+"""
+Unit tests for CompactProfile, the matching-only profile record, and compact campaign matching.
+
+Round-trip tests check that a CompactProfile holds the same matching fields as the Profile it was
+built from, and that compact matching agrees with match_campaign.
+"""
+import pytest
+from hypothesis import given, strategies as st
+from hypothesis.strategies import from_type
+from services.profiles.repository.campaigns_snapshot import CampaignSnapshot
+from services.profiles.repository.campaigns_types import Campaign, Matchers, LevelMatcher, HasMatcher, DoesNotHaveMatcher
+from services.profiles.repository.profiles_compact import CompactProfile, ProfileVocabulary, Vocabulary
+from services.profiles.repository.profiles_types import Profile
+from services.profiles.service import CompactCampaign, match_campaign, match_compact_campaign
+from services.profiles.warmup import SYNTHETIC_PROFILE
+from tools import profile_memory_benchmark
+
+st_profile = from_type(Profile)
+st_campaign = from_type(Campaign)
+st_names = st.lists(st.sampled_from(["sword", "shield", "bow", "axe"]), max_size=3, unique=True)
+st_countries = st.lists(st.sampled_from(["US", "FR", "CA"]), max_size=2, unique=True)
+st_matchers = st.builds(
+    Matchers,
+    level=st.one_of(st.none(), st.builds(LevelMatcher, min=st.integers(0, 5), max=st.integers(5, 10))),
+    has=st.one_of(st.none(), st.builds(HasMatcher, country=st_countries, items=st_names)),
+    does_not_have=st.one_of(st.none(), st.builds(DoesNotHaveMatcher, items=st_names)),
+)
+
+def test_vocabulary_interns_names():
+    vocabulary = Vocabulary()
+    assert vocabulary.intern("US") == 0
+    assert vocabulary.intern("FR") == 1
+    assert vocabulary.intern("US") == 0
+    assert len(vocabulary) == 2
+    assert vocabulary.name(1) == "FR"
+
+@given(st_profile)
+def test_compact_profile_round_trip(profile: Profile):
+    compact = CompactProfile.from_profile(profile, ProfileVocabulary())
+    assert compact.player_id == profile.player_id
+    assert compact.level == profile.level
+    assert compact.country_code() == profile.country
+    assert compact.inventory() == profile.inventory
+    assert list(compact.item_ids) == sorted(compact.item_ids)
+
+@given(st_profile)
+def test_compact_profile_from_document(profile: Profile):
+    vocabulary = ProfileVocabulary()
+    from_document = CompactProfile.from_document(profile.model_dump(), vocabulary)
+    from_profile = CompactProfile.from_profile(profile, vocabulary)
+    assert from_document.country == from_profile.country
+    assert from_document.item_ids == from_profile.item_ids
+    assert list(from_document.quantities) == list(from_profile.quantities)
+
+def test_compact_profiles_share_vocabulary():
+    vocabulary = ProfileVocabulary()
+    a = CompactProfile("a", 1, "US", {"sword": 1, "bow": 2}, vocabulary)
+    b = CompactProfile("b", 2, "US", {"bow": 0}, vocabulary)
+    assert a.country == b.country
+    assert len(vocabulary.items) == 2
+    assert a.quantity(vocabulary.items.intern("bow")) == 2
+    assert b.quantity(vocabulary.items.intern("bow")) == 0
+    assert b.quantity(vocabulary.items.intern("sword")) is None
+
+@given(
+    profile=st_profile,
+    campaign=st_campaign,
+    matchers=st_matchers,
+    level=st.integers(0, 10),
+    country=st.sampled_from(["US", "FR", "CA", "DE"]),
+    inventory=st.dictionaries(st.sampled_from(["sword", "shield", "bow", "axe"]), st.integers(0, 2)),
+)
+def test_match_compact_campaign_agrees_with_match_campaign(profile: Profile, campaign: Campaign, matchers: Matchers, level: int, country: str, inventory: dict):
+    profile = profile.model_copy(update={"level": level, "country": country, "inventory": inventory})
+    campaign = campaign.model_copy(update={"matchers": matchers})
+    snapshot = CampaignSnapshot([campaign])
+    compact = CompactProfile.from_profile(profile, snapshot.vocabulary)
+    compiled = CompactCampaign(campaign, snapshot.vocabulary)
+    assert match_compact_campaign(compact, compiled) == match_campaign(profile, campaign)
+
+def test_snapshot_vocabulary_is_per_snapshot():
+    snapshot = CampaignSnapshot()
+    assert snapshot.vocabulary is snapshot.vocabulary
+    assert CampaignSnapshot().vocabulary is not snapshot.vocabulary
+
+def test_memory_benchmark_compact_is_smaller(capsys):
+    profile_memory_benchmark.main(["--profiles", "200"])
+    report = profile_memory_benchmark.BenchmarkReport.model_validate_json(capsys.readouterr().out)
+    assert report.profiles == 200
+    assert 0 < report.compact_profile.bytes_per_profile < report.profile.bytes_per_profile
+
+def test_compact_profile_quantity_beyond_int64():
+    compact = CompactProfile("a", 1, "US", {"coins": 2 ** 70}, ProfileVocabulary())
+    assert compact.inventory() == {"coins": 2 ** 70}
+
+def test_compact_profile_from_document_coerces_doubles():
+    document = {"player_id": "p", "level": 5.0, "country": "US", "inventory": {"coins": 5.0, "gems": 2}}
+    compact = CompactProfile.from_document(document, ProfileVocabulary())
+    assert compact.level == 5
+    assert compact.inventory() == {"coins": 5, "gems": 2}
+    assert compact.inventory() == Profile.model_validate({**SYNTHETIC_PROFILE, **document}).inventory
+
+def test_compact_profile_from_document_rejects_fractional_quantity():
+    document = {"player_id": "p", "level": 5, "country": "US", "inventory": {"coins": 5.5}}
+    with pytest.raises(ValueError, match="inventory.coins"):
+        CompactProfile.from_document(document, ProfileVocabulary())
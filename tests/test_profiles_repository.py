@@ -11,17 +11,16 @@ Key concepts:
 """
 import pytest
 from hypothesis import given
-from unittest.mock import AsyncMock, create_autospec
-from motor.motor_asyncio import AsyncIOMotorClient
+from unittest.mock import AsyncMock, Mock
+from conftest import create_fake_db
 from services.profiles.repository.profiles import ProfileRepository
 from services.profiles.repository.profiles_types import Profile
+from services.profiles.repository.profiles_compact import ProfileVocabulary
 from hypothesis import strategies
+from pymongo import IndexModel, UpdateMany
 
 profile_base_strategy = strategies.from_type(Profile)
 
-def create_fake_db():
-    return create_autospec(AsyncIOMotorClient, instance=True)
-
 @pytest.mark.asyncio
 @given(profile_base_strategy)
 async def test_get_profile_by_player_id(expected_profile: Profile):
@@ -52,3 +51,63 @@ async def test_repository_rejects_profile_with_bad_custom_field(profile: Profile
     repo = ProfileRepository(fake_db)
     with pytest.raises(ValueError):
         await repo.get_profile_by_player_id(profile.player_id)
+
+@pytest.mark.asyncio
+async def test_bulk_update_active_campaigns():
+    fake_db = create_fake_db()
+    fake_db["profiles_db"]["profiles"].bulk_write = AsyncMock()
+    repo = ProfileRepository(fake_db)
+    await repo.bulk_update_active_campaigns(
+        [("new", {"level": {"$gte": 1, "$lte": 2}})],
+        [("old", {})],
+    )
+    fake_db["profiles_db"]["profiles"].bulk_write.assert_awaited_once_with([
+        UpdateMany({"active_campaigns": "old"}, {"$pull": {"active_campaigns": "old"}}),
+        UpdateMany(
+            {"level": {"$gte": 1, "$lte": 2}, "active_campaigns": {"$ne": "new"}},
+            {"$addToSet": {"active_campaigns": "new"}},
+        ),
+    ], ordered=True)
+
+@pytest.mark.asyncio
+async def test_bulk_update_active_campaigns_nothing_to_do():
+    fake_db = create_fake_db()
+    fake_db["profiles_db"]["profiles"].bulk_write = AsyncMock()
+    repo = ProfileRepository(fake_db)
+    await repo.bulk_update_active_campaigns([], [])
+    fake_db["profiles_db"]["profiles"].bulk_write.assert_not_awaited()
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = iter(documents)
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+@pytest.mark.asyncio
+@given(profile_base_strategy)
+async def test_find_compact_profiles(profile: Profile):
+    fake_db = create_fake_db()
+    fake_db["profiles_db"]["profiles"].find = Mock(return_value=FakeCursor([profile.model_dump()]))
+    repo = ProfileRepository(fake_db)
+    results = [p async for p in repo.find_compact_profiles({"level": 1}, ProfileVocabulary())]
+    fake_db["profiles_db"]["profiles"].find.assert_called_once_with(
+        {"level": 1}, {"_id": 0, "player_id": 1, "level": 1, "country": 1, "inventory": 1}
+    )
+    assert [(p.player_id, p.inventory()) for p in results] == [(profile.player_id, profile.inventory)]
+
+@pytest.mark.asyncio
+async def test_ensure_rematch_indexes():
+    fake_db = create_fake_db()
+    fake_db["profiles_db"]["profiles"].create_indexes = AsyncMock()
+    await ProfileRepository(fake_db).ensure_rematch_indexes()
+    (indexes,), _ = fake_db["profiles_db"]["profiles"].create_indexes.await_args
+    assert [index.document["key"] for index in indexes] == [
+        IndexModel("active_campaigns").document["key"],
+        IndexModel("level").document["key"],
+        IndexModel("country").document["key"],
+    ]
@@ -0,0 +1,30 @@
+"""
+Tests for the rematch job entry point, with MongoDB and the Campaign Service mocked.
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from hypothesis import given
+from hypothesis.strategies import from_type
+from conftest import create_fake_db
+from services.profiles import rematch
+from services.profiles.repository.campaigns import CampaignRepository
+from services.profiles.repository.campaigns_snapshot import CampaignSnapshot
+from services.profiles.repository.campaigns_types import Campaign
+
+@pytest.mark.asyncio
+@given(from_type(Campaign))
+async def test_main_rematches_and_saves_snapshot(campaign: Campaign):
+    fake_db = create_fake_db()
+    profiles = fake_db["profiles_db"]["profiles"]
+    snapshots = fake_db["profiles_db"]["campaign_snapshots"]
+    profiles.bulk_write = AsyncMock()
+    profiles.create_indexes = AsyncMock()
+    snapshots.find_one = AsyncMock(return_value=None)
+    snapshots.replace_one = AsyncMock()
+    with patch.object(rematch, "AsyncIOMotorClient", return_value=fake_db), \
+            patch.object(CampaignRepository, "get_snapshot", AsyncMock(return_value=CampaignSnapshot([campaign]))):
+        await rematch.main()
+    profiles.create_indexes.assert_awaited_once()
+    profiles.bulk_write.assert_awaited_once()
+    snapshots.replace_one.assert_awaited_once()
+    fake_db.close.assert_called_once()
@@ -6,7 +6,8 @@ from hypothesis.strategies import from_type
 from services.profiles.service import level_matcher, has_matcher, does_not_have_matcher, match_campaign
 from services.profiles.repository.profiles_types import Profile
 from services.profiles.repository.campaigns_types import Campaign, Matchers, LevelMatcher, HasMatcher, DoesNotHaveMatcher
-from services.profiles.service import ProfileService
+from services.profiles.service import ProfileService, campaign_filter
+from services.profiles.repository.campaigns_snapshot import CampaignSnapshot
 
 hypothesis.settings.register_profile('fast', max_examples=3)
 hypothesis.settings.load_profile('fast')#
@@ -107,7 +108,7 @@ def test_match_campaign_one_fails(profile: Profile, campaign:Campaign):
 async def test_get_client_config_profile_found_campaigns_matched(profile: Profile, campaign: Campaign):
     campaign = campaign.model_copy(update={"matchers": Matchers()})
     profile_repo = Mock(get_profile_by_player_id=AsyncMock(return_value=profile))
-    campaign_repo = Mock(get_active_campaigns=AsyncMock(return_value=[campaign]))
+    campaign_repo = Mock(get_snapshot=AsyncMock(return_value=CampaignSnapshot([campaign])))
     service = ProfileService(profile_repo, campaign_repo)
     result = await service.get_client_config(profile.player_id)
     assert result is not None
@@ -117,7 +118,7 @@ async def test_get_client_config_profile_found_campaigns_matched(profile: Profil
 @given(player_id=st.text(min_size=1, max_size=32))
 async def test_get_client_config_profile_not_found(player_id: str):
     profile_repo = Mock(get_profile_by_player_id=AsyncMock(return_value=None))
-    campaign_repo = Mock(get_active_campaigns=AsyncMock())
+    campaign_repo = Mock(get_snapshot=AsyncMock())
     service = ProfileService(profile_repo, campaign_repo)
     result = await service.get_client_config(player_id)
     assert result is None
@@ -128,8 +129,85 @@ async def test_get_client_config_profile_found_no_campaigns_matched(profile: Pro
     campaign = campaign.model_copy(update={"matchers": Matchers(level=LevelMatcher(min=999, max=1000))})
     profile = profile.model_copy(update={"level": 0})
     profile_repo = Mock(get_profile_by_player_id=AsyncMock(return_value=profile))
-    campaign_repo = Mock(get_active_campaigns=AsyncMock(return_value=[campaign]))
+    campaign_repo = Mock(get_snapshot=AsyncMock(return_value=CampaignSnapshot([campaign])))
     service = ProfileService(profile_repo, campaign_repo)
     result = await service.get_client_config(profile.player_id)
     assert result is not None
     assert result.active_campaigns == []
+
+@given(st_campaign)
+def test_campaign_filter_no_matchers(campaign: Campaign):
+    campaign = with_matchers(campaign, Matchers())
+    assert campaign_filter(campaign) == {}
+
+@given(st_campaign)
+def test_campaign_filter_all_matchers(campaign: Campaign):
+    campaign = with_matchers(campaign, Matchers(
+        level=LevelMatcher(min=1, max=10),
+        has=HasMatcher(country=['US', 'FR'], items=['sword', 'bow']),
+        does_not_have=DoesNotHaveMatcher(items=['bow', 'axe'])
+    ))
+    assert campaign_filter(campaign) == {
+        'level': {'$gte': 1, '$lte': 10},
+        'country': {'$in': ['US', 'FR']},
+        'inventory.sword': {'$exists': True},
+        'inventory.bow': {'$exists': True, '$not': {'$gt': 0}},
+        'inventory.axe': {'$not': {'$gt': 0}},
+    }
+
+@pytest.mark.asyncio
+@given(campaign=st_campaign)
+async def test_rematch_campaign_diff(campaign: Campaign):
+    added = campaign.model_copy(update={'name': 'added', 'matchers': Matchers(level=LevelMatcher(min=1, max=2))})
+    removed = campaign.model_copy(update={'name': 'removed'})
+    old = campaign.model_copy(update={'name': 'modified', 'matchers': Matchers()})
+    new = campaign.model_copy(update={'name': 'modified', 'matchers': Matchers(has=HasMatcher(country=['US']))})
+    priority_only = campaign.model_copy(update={'name': 'priority', 'priority': campaign.priority + 1})
+    old_snapshot = CampaignSnapshot([removed, old, campaign.model_copy(update={'name': 'priority'})])
+    new_snapshot = CampaignSnapshot([added, new, priority_only])
+    profile_repo = Mock(bulk_update_active_campaigns=AsyncMock())
+    service = ProfileService(profile_repo, Mock())
+    await service.rematch_campaign_diff(old_snapshot.diff(new_snapshot))
+    profile_repo.bulk_update_active_campaigns.assert_awaited_once_with(
+        [('added', {'level': {'$gte': 1, '$lte': 2}}), ('modified', {'country': {'$in': ['US']}})],
+        [('removed', {}), ('modified', {'$nor': [{'country': {'$in': ['US']}}]})],
+    )
+
+@given(st_campaign)
+def test_campaign_filter_escapes_unsafe_item_names(campaign: Campaign):
+    campaign = with_matchers(campaign, Matchers(
+        has=HasMatcher(items=['gem.red', 'sword']),
+        does_not_have=DoesNotHaveMatcher(items=['$bow'])
+    ))
+    query = campaign_filter(campaign)
+    assert query['inventory.sword'] == {'$exists': True}
+    assert not any(key.startswith('inventory.gem') or key.startswith('inventory.$') for key in query)
+    assert query['$expr'] == {'$and': [
+        {'$ne': [{'$type': {'$getField': {'field': {'$literal': 'gem.red'}, 'input': '$inventory'}}}, 'missing']},
+        {'$not': [{'$gt': [{'$getField': {'field': {'$literal': '$bow'}, 'input': '$inventory'}}, 0]}]},
+    ]}
+
+@pytest.mark.asyncio
+@given(campaign=st_campaign)
+async def test_rematch_changed_campaigns(campaign: Campaign):
+    previous = CampaignSnapshot([campaign.model_copy(update={'name': 'removed'})])
+    current = CampaignSnapshot([campaign.model_copy(update={'name': 'added', 'matchers': Matchers()})])
+    profile_repo = Mock(bulk_update_active_campaigns=AsyncMock())
+    campaign_repo = Mock(get_snapshot=AsyncMock(return_value=current))
+    snapshot_store = Mock(load=AsyncMock(return_value=previous), save=AsyncMock())
+    service = ProfileService(profile_repo, campaign_repo)
+    diff = await service.rematch_changed_campaigns(snapshot_store)
+    assert [c.name for c in diff.added] == ['added']
+    assert [c.name for c in diff.removed] == ['removed']
+    profile_repo.bulk_update_active_campaigns.assert_awaited_once_with([('added', {})], [('removed', {})])
+    snapshot_store.save.assert_awaited_once_with(current)
+
+@pytest.mark.asyncio
+@given(campaign=st_campaign)
+async def test_rematch_changed_campaigns_no_change(campaign: Campaign):
+    profile_repo = Mock(bulk_update_active_campaigns=AsyncMock())
+    campaign_repo = Mock(get_snapshot=AsyncMock(return_value=CampaignSnapshot([campaign])))
+    snapshot_store = Mock(load=AsyncMock(return_value=CampaignSnapshot([campaign])), save=AsyncMock())
+    service = ProfileService(profile_repo, campaign_repo)
+    assert (await service.rematch_changed_campaigns(snapshot_store)).is_empty()
+    profile_repo.bulk_update_active_campaigns.assert_not_awaited()
@@ -0,0 +1,147 @@
+"""
+Tests for the replay-based traffic simulator in tools/traffic_simulator.py.
+
+The in-process run drives the real profiles app against the in-memory fake MongoDB and campaigns stand-in.
+"""
+import asyncio
+import json
+import random
+import socket
+import pytest
+from collections import Counter
+from unittest.mock import Mock
+from conftest import FakeMongoClient
+from services.profiles.dependencies import get_mongo_client, get_service
+from tools import traffic_simulator
+from tools.traffic_simulator import CampaignsStandIn, TraceEvent, generate_trace, load_trace, replay, save_trace, run_in_process, run_over_http
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_generate_trace_is_deterministic():
+    assert generate_trace(100, 2, 50, seed=1) == generate_trace(100, 2, 50, seed=1)
+
+def test_generate_trace_zipf_popularity():
+    trace = generate_trace(1000, 20, 200, zipf_s=1.2, seed=0)
+    counts = Counter(e.player_id for e in trace if e.player_id is not None)
+    assert counts.most_common(1)[0][0] == "player_0"
+    assert counts["player_0"] > counts["player_9"] > 0
+
+def test_generate_trace_campaign_changes():
+    trace = generate_trace(10, 8, 10, campaigns=2, campaign_changes=3, seed=0)
+    changes = [e for e in trace if e.campaigns is not None]
+    assert [e.at for e in changes] == [0.0, 2.0, 4.0, 6.0]
+    assert len(changes[0].campaigns or []) == 2
+    assert all(a.campaigns != b.campaigns for a, b in zip(changes, changes[1:]))
+    assert [e.at for e in trace] == sorted(e.at for e in trace)
+
+def test_bursty_arrivals_within_duration():
+    arrivals = traffic_simulator.bursty_arrivals(5, 100, 10, 0.5, 0.5, random.Random(0))
+    assert arrivals == sorted(arrivals)
+    assert all(0 <= t < 5 for t in arrivals)
+
+def test_save_and_load_trace(tmp_path):
+    trace = generate_trace(10, 1, 20, seed=0)
+    path = tmp_path / "trace.jsonl"
+    save_trace(trace, str(path))
+    assert load_trace(str(path)) == trace
+
+def test_percentile():
+    assert traffic_simulator.percentile([], 0.5) == 0.0
+    assert traffic_simulator.percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+    assert traffic_simulator.percentile([1.0, 2.0, 3.0, 4.0], 0.99) == 4.0
+    assert traffic_simulator.percentile([1.0, 2.0, 3.0, 4.0], 0.0) == 1.0
+    values = [float(i) for i in range(1, 101)]
+    assert traffic_simulator.percentile(values, 0.50) == 50.0
+    assert traffic_simulator.percentile(values, 0.95) == 95.0
+    assert traffic_simulator.percentile(values, 0.99) == 99.0
+    assert traffic_simulator.percentile(values, 1.0) == 100.0
+
+@pytest.mark.asyncio
+async def test_run_in_process():
+    trace = generate_trace(50, 1, 50, campaign_changes=2, seed=0)
+    requests = sum(1 for e in trace if e.player_id is not None)
+    report = await run_in_process(trace, speed=0, concurrency=10)
+    assert report.requests == requests
+    assert report.errors == 0
+    assert report.campaign_changes == 3
+    assert report.mongo_ops == requests
+    # One shared repository caches the snapshot, as in the service
+    assert report.campaign_fetches == 1
+    assert report.latency_p50_ms <= report.latency_p99_ms <= report.latency_max_ms
+    assert not traffic_simulator.profiles_app.dependency_overrides
+
+@pytest.mark.asyncio
+async def test_run_in_process_seeded_mongo(monkeypatch):
+    clients = []
+    monkeypatch.setattr(traffic_simulator, "AsyncIOMotorClient", lambda url: clients.append(FakeMongoClient()) or clients[-1])
+    trace = generate_trace(20, 1, 20, seed=0)
+    requests = sum(1 for e in trace if e.player_id is not None)
+    report = await run_in_process(trace, mongo_url="mongodb://fake", speed=0)
+    assert report.errors == 0
+    assert report.mongo_ops == requests
+    assert len(clients[0].profiles.documents) == len({e.player_id for e in trace if e.player_id})
+    clients[0].close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_run_over_http_counts_errors(monkeypatch):
+    clients = []
+    monkeypatch.setattr(traffic_simulator, "AsyncIOMotorClient", lambda url: clients.append(FakeMongoClient()) or clients[-1])
+    trace = generate_trace(10, 1, 10, seed=0)
+    requests = sum(1 for e in trace if e.player_id is not None)
+    # Nothing listens on the target port, so every request fails to connect
+    report = await run_over_http(trace, f"http://127.0.0.1:{free_port()}", free_port(), mongo_url="mongodb://fake", speed=0)
+    assert report.requests == requests
+    assert report.errors == requests
+    assert report.campaign_fetches == 0
+    assert report.mongo_ops == 0
+    clients[0].close.assert_called_once()
+
+def test_main_save_trace_then_replay(tmp_path, capsys):
+    path = tmp_path / "trace.jsonl"
+    traffic_simulator.main(["--players", "20", "--duration", "1", "--rate", "20", "--save-trace", str(path)])
+    assert capsys.readouterr().out == ""
+    traffic_simulator.main(["--trace", str(path), "--speed", "0"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == sum(1 for e in load_trace(str(path)) if e.player_id is not None)
+    assert report["errors"] == 0
+
+@pytest.mark.asyncio
+async def test_run_in_process_campaigns_ttl():
+    trace = generate_trace(20, 1, 20, seed=0)
+    requests = sum(1 for e in trace if e.player_id is not None)
+    report = await run_in_process(trace, speed=0, campaigns_ttl=0)
+    assert report.campaign_fetches == requests
+
+class SlowClient:
+    """
+    Answers every request after a fixed service time.
+    """
+    def __init__(self, service_time: float):
+        self.service_time = service_time
+
+    async def get(self, url: str):
+        await asyncio.sleep(self.service_time)
+        return Mock(status_code=200)
+
+@pytest.mark.asyncio
+async def test_replay_latency_includes_queueing():
+    # 20 simultaneous arrivals served one at a time: the last waits behind 19 others
+    trace = [TraceEvent(at=0.0, player_id=f"player_{i}") for i in range(20)]
+    report = await replay(trace, SlowClient(0.01), CampaignsStandIn(), speed=0, concurrency=1)  # type: ignore[arg-type]
+    assert report.latency_p50_ms >= 90
+    assert report.latency_p99_ms >= 190
+
+@pytest.mark.asyncio
+async def test_run_in_process_keeps_caller_overrides():
+    app = traffic_simulator.profiles_app
+    caller_override = lambda: "caller"
+    app.dependency_overrides[get_service] = caller_override
+    app.dependency_overrides[get_mongo_client] = caller_override
+    try:
+        await run_in_process(generate_trace(5, 1, 5, seed=0), speed=0)
+        assert app.dependency_overrides == {get_service: caller_override, get_mongo_client: caller_override}
+    finally:
+        app.dependency_overrides.clear()
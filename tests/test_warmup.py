@@ -0,0 +1,97 @@
+"""
+Unit tests for the profiles service startup warm-up.
+
+The MongoDB client and the Campaign Service are replaced with fakes so no network is needed.
+"""
+import pytest
+from typing import Any, List
+from unittest.mock import AsyncMock, patch
+from conftest import FakeMongoClient
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from hypothesis import given
+from hypothesis.strategies import from_type
+from services.profiles import main, warmup
+from services.profiles.dependencies import get_mongo_client
+from services.profiles.repository.campaigns import CampaignRepository
+from services.profiles.repository.campaigns_snapshot import CampaignSnapshot
+from services.profiles.repository.campaigns_types import Campaign, Matchers
+
+st_campaign = from_type(Campaign)
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.state.mongo_client = FakeMongoClient()
+    app.state.campaign_repository = CampaignRepository()
+    return app
+
+def counting_fetch_campaigns(fetches: List[Any], campaign: Campaign):
+    async def fetch_campaigns(self, start_date, end_date):
+        fetches.append((start_date, end_date))
+        return [campaign]
+    return fetch_campaigns
+
+@pytest.mark.asyncio
+async def test_open_mongo_connections():
+    app = make_app()
+    await warmup.open_mongo_connections(app.state.mongo_client, 4)
+    assert app.state.mongo_client.admin.command.await_count == 4
+
+@pytest.mark.asyncio
+@given(st_campaign)
+async def test_warm_up_prefetches_snapshot(campaign: Campaign):
+    app = make_app()
+    snapshot = CampaignSnapshot([campaign])
+    with patch.object(CampaignRepository, "get_snapshot", AsyncMock(return_value=snapshot)) as get_snapshot, \
+            patch.object(warmup, "request_client_config", AsyncMock(return_value=200)) as request_client_config:
+        await warmup.warm_up(app, 3, timeout=1)
+    get_snapshot.assert_awaited_once()
+    assert app.state.mongo_client.admin.command.await_count == 3
+    request_client_config.assert_awaited_once_with(app)
+
+@pytest.mark.asyncio
+async def test_warm_up_failures_do_not_block_startup():
+    app = make_app()
+    app.state.mongo_client.admin.command = AsyncMock(side_effect=Exception("mongo down"))
+    with patch.object(CampaignRepository, "get_snapshot", AsyncMock(side_effect=Exception("campaigns down"))), \
+            patch.object(warmup, "request_client_config", AsyncMock(return_value=500)):
+        await warmup.warm_up(app, 1, timeout=1)
+
+@pytest.mark.asyncio
+async def test_request_client_config_serves_synthetic_profile():
+    app = FastAPI()
+    previous = lambda: "previous"
+    app.dependency_overrides[get_mongo_client] = previous
+    seen = []
+    @app.get("/get_client_config/{player_id}")
+    async def get_client_config(player_id: str, mongo_client: Any = Depends(get_mongo_client)):
+        seen.append(await mongo_client["profiles_db"]["profiles"].find_one({"player_id": player_id}))
+    assert await warmup.request_client_config(app) == 200
+    assert seen == [warmup.SYNTHETIC_PROFILE]
+    assert app.dependency_overrides[get_mongo_client] is previous
+
+@given(st_campaign)
+def test_request_after_warm_up_makes_no_campaign_fetch(campaign: Campaign):
+    campaign = campaign.model_copy(update={"matchers": Matchers()})
+    fetches: List[Any] = []
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("WARMUP_ENABLED", "true")
+        profile = {**warmup.SYNTHETIC_PROFILE, "player_id": "player_1", "_id": "x"}
+        monkeypatch.setattr(main, "AsyncIOMotorClient", lambda *args, **kwargs: FakeMongoClient([profile]))
+        monkeypatch.setattr(CampaignRepository, "_fetch_campaigns", counting_fetch_campaigns(fetches, campaign))
+        with TestClient(main.app) as client:
+            # Warm-up fetched the snapshot once, and its synthetic request matched against it
+            assert len(fetches) == 1
+            response = client.get("/get_client_config/player_1")
+            assert response.status_code == 200
+            assert response.json()["active_campaigns"] == [campaign.name]
+            assert len(fetches) == 1
+
+def test_lifespan_runs_warm_up(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "true")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("WARMUP_TIMEOUT_SECONDS", "2.5")
+    warm_up = AsyncMock()
+    monkeypatch.setattr(main, "warm_up", warm_up)
+    with TestClient(main.app):
+        warm_up.assert_awaited_once_with(main.app, 5, 2.5)
@@ -0,0 +1,65 @@
+"""
+Memory-per-profile benchmark comparing Profile models with CompactProfile records.
+
+Builds the same generated profile documents both ways and reports the memory retained per
+profile (measured with tracemalloc) and the construction time.
+
+Usage:
+    python -m tools.profile_memory_benchmark --profiles 100000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from services.profiles.repository.profiles_compact import CompactProfile, ProfileVocabulary
+from services.profiles.repository.profiles_types import Profile
+from tools.traffic_simulator import make_player_id, make_profile
+
+class Measurement(BaseModel):
+    bytes_per_profile: float
+    microseconds_per_profile: float
+
+class BenchmarkReport(BaseModel):
+    profiles: int
+    profile: Measurement
+    compact_profile: Measurement
+
+def measure(documents: List[Dict[str, Any]], build: Callable[[Dict[str, Any]], Any]) -> Measurement:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        built = [build(document) for document in documents]
+        elapsed = time.perf_counter() - started
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del built
+    return Measurement(
+        bytes_per_profile=retained / len(documents),
+        microseconds_per_profile=elapsed / len(documents) * 1e6,
+    )
+
+def run(profiles: int, seed: int = 0) -> BenchmarkReport:
+    rng = random.Random(seed)
+    documents = [make_profile(make_player_id(i), rng) for i in range(profiles)]
+    vocabulary = ProfileVocabulary()
+    return BenchmarkReport(
+        profiles=profiles,
+        profile=measure(documents, Profile.model_validate),
+        compact_profile=measure(documents, lambda document: CompactProfile.from_document(document, vocabulary)),
+    )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(run(args.profiles, args.seed).model_dump_json(indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Replay-based traffic simulator for capacity planning of the Profile Service.
+
+Generates (or replays) a request trace with Zipf-distributed player popularity, bursty
+arrivals and campaign changes during the run, drives the profiles app with it and reports
+throughput, tail latency, MongoDB operations and campaign fetches per request.
+
+The profiles app can be driven in-process (through an ASGI transport, against an in-memory
+fake MongoDB or a seeded local MongoDB) or over HTTP. In both cases campaigns are served by
+a local stand-in; in HTTP mode the profiles service must be started with CAMPAIGNS_URL
+pointing at it, e.g. CAMPAIGNS_URL=http://localhost:8001/campaigns.
+
+Usage:
+    python -m tools.traffic_simulator --players 10000 --duration 30 --rate 200
+    python -m tools.traffic_simulator --save-trace trace.jsonl --duration 60
+    python -m tools.traffic_simulator --trace trace.jsonl --mongo-url mongodb://localhost:27017
+    python -m tools.traffic_simulator --trace trace.jsonl --target http://localhost:54326
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from pymongo import ReplaceOne
+from services.profiles.dependencies import get_campaign_repository, get_mongo_client
+from services.profiles.main import app as profiles_app
+from services.profiles.repository.campaigns import CampaignRepository
+from services.profiles.repository.campaigns_types import Campaign, Matchers, LevelMatcher, HasMatcher, DoesNotHaveMatcher
+from services.profiles.warmup import SYNTHETIC_PROFILE
+
+COUNTRIES = ["US", "CA", "FR", "RO", "DE", "BR", "JP", "GB"]
+ITEMS = [f"item_{i}" for i in range(1, 21)]
+
+class TraceEvent(BaseModel):
+    """
+    A request for player_id, or a change of the active campaigns, at `at` seconds into the run.
+    """
+    at: float
+    player_id: Optional[str] = None
+    campaigns: Optional[List[Campaign]] = None
+
+class Report(BaseModel):
+    requests: int
+    errors: int
+    campaign_changes: int
+    duration: float
+    throughput: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    mongo_ops: Optional[int]
+    mongo_ops_per_request: Optional[float]
+    campaign_fetches: int
+    campaign_fetches_per_request: float
+
+def make_player_id(index: int) -> str:
+    return f"player_{index}"
+
+def make_profile(player_id: str, rng: random.Random) -> Dict[str, Any]:
+    items = rng.sample(ITEMS, rng.randint(0, 5))
+    return {
+        **SYNTHETIC_PROFILE,
+        "player_id": player_id,
+        "level": rng.randint(1, 100),
+        "country": rng.choice(COUNTRIES),
+        "inventory": {item: rng.randint(0, 3) for item in items},
+    }
+
+def make_campaign(name: str, rng: random.Random) -> Campaign:
+    level_min = rng.randint(1, 80)
+    return Campaign(
+        game="mygame",
+        name=name,
+        priority=rng.uniform(0, 100),
+        matchers=Matchers(
+            level=LevelMatcher(min=level_min, max=level_min + rng.randint(0, 40)),
+            has=HasMatcher(country=rng.sample(COUNTRIES, 3), items=rng.sample(ITEMS, rng.randint(0, 1))),
+            does_not_have=DoesNotHaveMatcher(items=rng.sample(ITEMS, 1)),
+        ),
+        start_date="2022-01-25 00:00:00Z",
+        end_date="2022-02-25 00:00:00Z",
+        enabled=True,
+        last_updated="2021-07-13 11:46:58Z",
+    )
+
+def change_campaigns(campaigns: List[Campaign], version: int, rng: random.Random) -> List[Campaign]:
+    """
+    Return a new campaign list where one campaign is replaced, modified or added.
+    """
+    campaigns = list(campaigns)
+    action = rng.choice(["replace", "modify", "add"]) if campaigns else "add"
+    if action == "add":
+        campaigns.append(make_campaign(f"campaign_v{version}", rng))
+    else:
+        index = rng.randrange(len(campaigns))
+        name = f"campaign_v{version}" if action == "replace" else campaigns[index].name
+        campaigns[index] = make_campaign(name, rng)
+    return campaigns
+
+def bursty_arrivals(duration: float, rate: float, burst_factor: float, burst_probability: float, mean_period: float, rng: random.Random) -> List[float]:
+    """
+    Arrival times of a two-state Markov-modulated Poisson process.
+
+    Time is cut into exponentially distributed periods; each period is a burst with
+    probability burst_probability, during which the arrival rate is rate * burst_factor.
+    """
+    arrivals: List[float] = []
+    period_start = 0.0
+    while period_start < duration:
+        period_end = min(duration, period_start + rng.expovariate(1 / mean_period))
+        period_rate = rate * burst_factor if rng.random() < burst_probability else rate
+        t = period_start + rng.expovariate(period_rate)
+        while t < period_end:
+            arrivals.append(t)
+            t += rng.expovariate(period_rate)
+        period_start = period_end
+    return arrivals
+
+def generate_trace(
+    players: int,
+    duration: float,
+    rate: float,
+    zipf_s: float = 1.1,
+    burst_factor: float = 5.0,
+    burst_probability: float = 0.1,
+    mean_period: float = 2.0,
+    campaigns: int = 5,
+    campaign_changes: int = 3,
+    seed: int = 0,
+) -> List[TraceEvent]:
+    """
+    Generate a request trace. Player i is requested with probability proportional to 1 / (i + 1) ** zipf_s.
+    The initial campaigns are set at t=0 and changed campaign_changes times, evenly spaced over the run.
+    """
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / (i + 1) ** zipf_s for i in range(players)))
+    arrivals = bursty_arrivals(duration, rate, burst_factor, burst_probability, mean_period, rng)
+    indexes = rng.choices(range(players), cum_weights=cum_weights, k=len(arrivals))
+    events = [TraceEvent(at=at, player_id=make_player_id(i)) for at, i in zip(arrivals, indexes)]
+    current = [make_campaign(f"campaign_{i}", rng) for i in range(campaigns)]
+    changes = [TraceEvent(at=0.0, campaigns=current)]
+    for version in range(1, campaign_changes + 1):
+        current = change_campaigns(current, version, rng)
+        changes.append(TraceEvent(at=duration * version / (campaign_changes + 1), campaigns=current))
+    # Stable sort keeps a campaign change ahead of requests at the same instant
+    return sorted(changes + events, key=lambda e: (e.at, e.player_id is not None))
+
+def save_trace(trace: List[TraceEvent], path: str) -> None:
+    with open(path, "w") as f:
+        for event in trace:
+            f.write(event.model_dump_json(exclude_none=True) + "\n")
+
+def load_trace(path: str) -> List[TraceEvent]:
+    with open(path) as f:
+        return [TraceEvent.model_validate_json(line) for line in f if line.strip()]
+
+def trace_profiles(trace: List[TraceEvent], seed: int) -> List[Dict[str, Any]]:
+    """
+    Generate a profile for every player requested in the trace.
+    """
+    rng = random.Random(seed)
+    return [make_profile(p, rng) for p in sorted({e.player_id for e in trace if e.player_id is not None})]
+
+class FakeCollection:
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.ops = 0
+
+    async def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self.ops += 1
+        document = self.documents.get(query["player_id"])
+        return dict(document) if document is not None else None
+
+class FakeMongoClient:
+    """
+    In-memory stand-in for AsyncIOMotorClient supporting profile lookups by player_id, counting operations.
+    """
+    def __init__(self, profiles: List[Dict[str, Any]]):
+        self.profiles = FakeCollection()
+        self.profiles.documents = {p["player_id"]: p for p in profiles}
+
+    def __getitem__(self, name: str) -> Dict[str, FakeCollection]:
+        return {"profiles": self.profiles}
+
+    async def ops(self) -> int:
+        return self.profiles.ops
+
+class MongoOpCounter:
+    """
+    Counts operations on a real MongoDB through serverStatus opcounters. Counters are server-wide.
+    """
+    def __init__(self, mongo_client: Any):
+        self._mongo_client = mongo_client
+
+    async def ops(self) -> int:
+        status = await self._mongo_client.admin.command({"serverStatus": 1})
+        return sum(status["opcounters"].values())
+
+class CampaignsStandIn:
+    """
+    Local stand-in for the Campaign Service serving a mutable campaign list and counting fetches.
+    """
+    def __init__(self):
+        self.campaigns: List[Campaign] = []
+        self.fetches = 0
+        self.app = FastAPI()
+        self.app.get("/campaigns")(self._get_campaigns)
+
+    async def _get_campaigns(self) -> List[Dict[str, Any]]:
+        self.fetches += 1
+        return [c.model_dump() for c in self.campaigns]
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile: the smallest value with at least q of the samples at or below it.
+    """
+    if not sorted_values:
+        return 0.0
+    # Rounding keeps float error in q * n (e.g. 0.95 * 100 = 95.00000000000001) from bumping the rank
+    rank = math.ceil(round(q * len(sorted_values), 9))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+async def replay(
+    trace: List[TraceEvent],
+    client: httpx.AsyncClient,
+    campaigns: CampaignsStandIn,
+    mongo_ops: Any = None,
+    speed: float = 1.0,
+    concurrency: int = 100,
+) -> Report:
+    """
+    Replay the trace open-loop: each event fires at event.at / speed seconds, with at most
+    `concurrency` requests in flight. speed=0 replays as fast as possible.
+    `mongo_ops` is an async callable returning a cumulative MongoDB operation count.
+
+    Latency is measured from each request's scheduled arrival (or, with speed=0, from when it
+    was issued), so time spent queued behind the concurrency limit is included rather than
+    omitted.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def send(player_id: str, scheduled: float) -> None:
+        nonlocal errors
+        async with semaphore:
+            try:
+                response = await client.get(f"/get_client_config/{player_id}")
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - scheduled)
+
+    mongo_ops_before = await mongo_ops() if mongo_ops else None
+    fetches_before = campaigns.fetches
+    tasks: List[asyncio.Task] = []
+    changes = 0
+    started = time.perf_counter()
+    for event in trace:
+        scheduled = started + event.at / speed if speed else time.perf_counter()
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if event.campaigns is not None:
+            campaigns.campaigns = event.campaigns
+            changes += 1
+        if event.player_id is not None:
+            tasks.append(asyncio.create_task(send(event.player_id, scheduled)))
+    await asyncio.gather(*tasks)
+    duration = time.perf_counter() - started
+    total_mongo_ops = await mongo_ops() - mongo_ops_before if mongo_ops and mongo_ops_before is not None else None
+    total_fetches = campaigns.fetches - fetches_before
+    requests = len(latencies)
+    latencies.sort()
+    return Report(
+        requests=requests,
+        errors=errors,
+        campaign_changes=changes,
+        duration=duration,
+        throughput=requests / duration if duration else 0.0,
+        latency_p50_ms=percentile(latencies, 0.50) * 1000,
+        latency_p95_ms=percentile(latencies, 0.95) * 1000,
+        latency_p99_ms=percentile(latencies, 0.99) * 1000,
+        latency_max_ms=(latencies[-1] if latencies else 0.0) * 1000,
+        mongo_ops=total_mongo_ops,
+        mongo_ops_per_request=total_mongo_ops / requests if total_mongo_ops is not None and requests else None,
+        campaign_fetches=total_fetches,
+        campaign_fetches_per_request=total_fetches / requests if requests else 0.0,
+    )
+
+async def seed_mongo(mongo_client: Any, profiles: List[Dict[str, Any]]) -> None:
+    if profiles:
+        await mongo_client["profiles_db"]["profiles"].bulk_write(
+            [ReplaceOne({"player_id": p["player_id"]}, p, upsert=True) for p in profiles], ordered=False
+        )
+
+@contextmanager
+def override_dependencies(app: FastAPI, overrides: Dict[Callable[..., Any], Callable[..., Any]]) -> Iterator[None]:
+    """
+    Apply dependency overrides to app, restoring only those keys, as they were, on exit.
+    """
+    missing = object()
+    previous = {dependency: app.dependency_overrides.get(dependency, missing) for dependency in overrides}
+    app.dependency_overrides.update(overrides)
+    try:
+        yield
+    finally:
+        for dependency, override in previous.items():
+            if override is missing:
+                app.dependency_overrides.pop(dependency, None)
+            else:
+                app.dependency_overrides[dependency] = override
+
+async def run_in_process(trace: List[TraceEvent], mongo_url: Optional[str] = None, seed: int = 0, speed: float = 1.0, concurrency: int = 100, campaigns_ttl: float = 300) -> Report:
+    """
+    Drive the profiles app in-process against an in-memory fake MongoDB, or a seeded MongoDB at mongo_url.
+    Like the service, a single CampaignRepository caching the snapshot for campaigns_ttl seconds serves all requests.
+    """
+    profiles = trace_profiles(trace, seed)
+    campaigns = CampaignsStandIn()
+    mongo_ops: Any
+    if mongo_url:
+        mongo_client: Any = AsyncIOMotorClient(mongo_url)
+        await seed_mongo(mongo_client, profiles)
+        mongo_ops = MongoOpCounter(mongo_client).ops
+    else:
+        mongo_client = FakeMongoClient(profiles)
+        mongo_ops = mongo_client.ops
+    campaign_repository = CampaignRepository(url="http://campaigns/campaigns", transport=httpx.ASGITransport(app=campaigns.app), ttl=campaigns_ttl)
+    overrides = {get_mongo_client: lambda: mongo_client, get_campaign_repository: lambda: campaign_repository}
+    try:
+        with override_dependencies(profiles_app, overrides):
+            transport = httpx.ASGITransport(app=profiles_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://profiles") as client:
+                return await replay(trace, client, campaigns, mongo_ops, speed, concurrency)
+    finally:
+        if mongo_url:
+            mongo_client.close()
+
+async def run_over_http(trace: List[TraceEvent], target: str, campaigns_port: int, mongo_url: Optional[str] = None, seed: int = 0, speed: float = 1.0, concurrency: int = 100) -> Report:
+    """
+    Drive a running profiles service over HTTP, serving campaigns from a local stand-in on campaigns_port.
+    If mongo_url is given, that MongoDB is seeded with the trace's profiles and its operations are counted.
+    """
+    campaigns = CampaignsStandIn()
+    server = uvicorn.Server(uvicorn.Config(campaigns.app, port=campaigns_port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    mongo_client: Any = None
+    mongo_ops = None
+    try:
+        while not server.started:
+            await asyncio.sleep(0.05)
+        if mongo_url:
+            mongo_client = AsyncIOMotorClient(mongo_url)
+            await seed_mongo(mongo_client, trace_profiles(trace, seed))
+            mongo_ops = MongoOpCounter(mongo_client).ops
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=target, limits=limits) as client:
+            return await replay(trace, client, campaigns, mongo_ops, speed, concurrency)
+    finally:
+        server.should_exit = True
+        await server_task
+        if mongo_client is not None:
+            mongo_client.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="Replay this JSON lines trace instead of generating one")
+    parser.add_argument("--save-trace", help="Write the generated trace to this file and exit")
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--duration", type=float, default=10.0, help="Trace duration in seconds")
+    parser.add_argument("--rate", type=float, default=100.0, help="Base arrival rate in requests per second")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent of player popularity")
+    parser.add_argument("--burst-factor", type=float, default=5.0)
+    parser.add_argument("--burst-probability", type=float, default=0.1)
+    parser.add_argument("--campaigns", type=int, default=5)
+    parser.add_argument("--campaign-changes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier; 0 replays as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--target", help="Base URL of a running profiles service; in-process if omitted")
+    parser.add_argument("--campaigns-port", type=int, default=8001, help="Port of the local campaigns stand-in in HTTP mode")
+    parser.add_argument("--campaigns-ttl", type=float, default=300.0, help="Campaign snapshot cache TTL in seconds, in-process only")
+    parser.add_argument("--mongo-url", help="Seed and use this MongoDB instead of the in-memory fake")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = generate_trace(
+            args.players, args.duration, args.rate, args.zipf_s, args.burst_factor, args.burst_probability,
+            campaigns=args.campaigns, campaign_changes=args.campaign_changes, seed=args.seed,
+        )
+    if args.save_trace:
+        save_trace(trace, args.save_trace)
+        return
+    if args.target:
+        report = asyncio.run(run_over_http(trace, args.target, args.campaigns_port, args.mongo_url, args.seed, args.speed, args.concurrency))
+    else:
+        report = asyncio.run(run_in_process(trace, args.mongo_url, args.seed, args.speed, args.concurrency, args.campaigns_ttl))
+    print(report.model_dump_json(indent=2))
+
+if __name__ == "__main__":
+    main()